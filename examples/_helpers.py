@@ -1,3 +1,12 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+import warnings
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, as_completed, wait
+from typing import Callable, Iterator, Optional, Sequence
 import sgamesolver
 import numpy as np
 
@@ -15,3 +24,700 @@ def assert_games_equal(game1: sgamesolver.SGame, game2: sgamesolver.SGame) -> No
     assert np.allclose(game1.u, game2.u)
     assert np.allclose(game1.phi, game2.phi)
     assert np.allclose(game1.delta, game2.delta)
+
+
+def compress_strategies(strategies: np.ndarray, action_mask: np.ndarray) -> np.ndarray:
+    # drops padded actions: [..., state, player, action] -> [..., num_actions_total]
+    return strategies[..., action_mask]
+
+
+def expand_strategies(strategies: np.ndarray, action_mask: np.ndarray) -> np.ndarray:
+    expanded = np.zeros(shape=strategies.shape[:-1] + action_mask.shape, dtype=strategies.dtype)
+    expanded[..., action_mask] = strategies
+    return expanded
+
+
+def save_game(game: sgamesolver.SGame, path: str) -> None:
+    labels = {'state_labels': game.state_labels,
+              'player_labels': game.player_labels,
+              'action_labels': game.action_labels}
+    np.savez(path, u=game.u, phi=game.phi, delta=game.delta, action_mask=game.action_mask,
+             labels=np.array(json.dumps(labels)))
+
+
+def load_game(path: str) -> sgamesolver.SGame:
+    # rebuilds the game via SGame.__init__, whose cost grows with states^2 * action profiles
+    # (about 1.6s for 400 states, 2 players and 4 actions): a portable format, not a fast one;
+    # pickling the game loads the same game in about 20ms, which is how the process pools below pass it on
+    with np.load(path) as data:
+        u, phi, delta = data['u'], data['phi'], data['delta']
+        nums_actions = data['action_mask'].sum(axis=-1)
+        labels = json.loads(str(data['labels']))
+
+    # SGame expects per-state arrays without padded actions
+    payoff_matrices = []
+    transition_matrices = []
+    for state, nums_a in enumerate(nums_actions):
+        a_slices = tuple(slice(num_a) for num_a in nums_a)
+        payoff_matrices.append(u[(state, slice(None)) + a_slices])
+        transition_matrices.append(phi[(state,) + a_slices])
+
+    game = sgamesolver.SGame(payoff_matrices=payoff_matrices,
+                             transition_matrices=transition_matrices,
+                             discount_factors=delta)
+    game.state_labels = labels['state_labels']
+    game.player_labels = labels['player_labels']
+    game.action_labels = labels['action_labels']
+    return game
+
+
+_worker_game: Optional[sgamesolver.SGame] = None
+
+
+def _init_worker(game: sgamesolver.SGame) -> None:
+    # game is transferred once per worker process, not once per trace
+    global _worker_game
+    _worker_game = game
+
+
+def _trace_prior(rho: np.ndarray, decimals: int) -> Optional[np.ndarray]:
+    rho = np.nan_to_num(rho)  # prior: transform NaN to 0
+    homotopy = sgamesolver.homotopy.LogTracing(_worker_game, rho=rho)
+    homotopy.solver_setup()
+    homotopy.solver.verbose = 0
+    homotopy.solve()
+    if homotopy.equilibrium is None:
+        return None  # a single failed trace should not end the whole search
+    return homotopy.equilibrium.strategies.round(decimals)
+
+
+def iter_search_priors(game: sgamesolver.SGame, priors: Sequence[np.ndarray], n_workers: Optional[int] = None,
+                       decimals: int = 4) -> Iterator[tuple[int, Optional[np.ndarray]]]:
+    # yields (run, strategies) in order of completion; strategies is None if the trace failed
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(game,)) as executor:
+        futures = {executor.submit(_trace_prior, rho, decimals): run for run, rho in enumerate(priors)}
+        try:
+            for future in as_completed(futures):
+                if future.exception() is not None:
+                    warnings.warn(f'Trace under prior {futures[future]} failed: {future.exception()!r}')
+                    yield futures[future], None
+                else:
+                    yield futures[future], future.result()
+        finally:
+            # consumer stopped early: do not wait for the remaining traces on shutdown
+            for future in futures:
+                future.cancel()
+
+
+def search_priors(game: sgamesolver.SGame, priors: Sequence[np.ndarray], n_workers: Optional[int] = None,
+                  decimals: int = 4, printout: bool = False) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # returns strategies per prior (NaN for failed traces), the distinct equilibria and how often each was found
+    strategies = np.full(shape=(len(priors),) + game.action_mask.shape, fill_value=np.nan)
+    solved_runs = []
+    for num_done, (run, strategy) in enumerate(iter_search_priors(game, priors, n_workers, decimals)):
+        if strategy is not None:
+            strategies[run] = strategy
+            solved_runs.append(run)
+        if printout:
+            print(f"done run {num_done+1}/{len(priors)}" + ("" if strategy is not None else " (failed)"))
+    if len(solved_runs) < len(priors):
+        warnings.warn(f'{len(priors) - len(solved_runs)} of {len(priors)} traces did not find an equilibrium.')
+
+    # padded actions are NaN, and NaN never compares equal: compare without them
+    solved_runs = np.sort(solved_runs).astype(np.int64)
+    _, first_runs, counts = np.unique(compress_strategies(strategies[solved_runs], game.action_mask), axis=0,
+                                      return_index=True, return_counts=True)
+    return strategies, strategies[solved_runs[first_runs]], counts
+
+
+def solve_qre_at(homotopy: sgamesolver.homotopy.QRE, lambdas: Sequence[float]) -> tuple[np.ndarray, np.ndarray]:
+    # the solver continues from its current point: visiting targets in increasing order traces the path only once
+    strategies = [np.empty(0)] * len(lambdas)
+    values = [np.empty(0)] * len(lambdas)
+    for idx in np.argsort(lambdas):
+        homotopy.solver.t_target = lambdas[idx]
+        homotopy.equilibrium = None  # solve() keeps the previous equilibrium if the target is not reached
+        homotopy.solve()
+        # converged: t is within convergence_tol of a finite target
+        if homotopy.equilibrium is None or not homotopy.solver.converged:
+            raise RuntimeError(f'Solver did not reach lambda = {lambdas[idx]} (stopped at t = {homotopy.solver.t:.4g}).')
+        strategies[idx] = homotopy.equilibrium.strategies
+        values[idx] = homotopy.equilibrium.values
+    return np.stack(strategies), np.stack(values)
+
+
+def game_fingerprint(game: sgamesolver.SGame) -> str:
+    hasher = hashlib.sha256()
+    # shapes and action counts as well: equal bytes can be laid out differently
+    for array in (game.u.shape, game.nums_actions):
+        hasher.update(np.ascontiguousarray(array, dtype=np.int64).tobytes())
+    for array in (game.u, game.phi, game.delta):
+        hasher.update(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+    return hasher.hexdigest()
+
+
+def homotopy_fingerprint(homotopy) -> str:
+    hasher = hashlib.sha256(type(homotopy).__name__.encode())
+    hasher.update(game_fingerprint(homotopy.game).encode())
+    for attr in ('rho', 'nu', 'eta'):  # LogTracing parameters
+        value = getattr(homotopy, attr, None)
+        if isinstance(value, str):  # e.g. rho='centroid'
+            hasher.update(value.encode())
+        elif value is not None:
+            hasher.update(np.ascontiguousarray(value, dtype=np.float64).tobytes())
+    return hasher.hexdigest()
+
+
+_SOLVER_STATE = {'step': int, 's': float, 'sign': int, 'ds': float, 'consecutive_successes': int}
+
+
+def get_solver_parameters(homotopy) -> dict:
+    # current values of all (serializable) solver parameters, e.g. without distance_function
+    parameters = {key: getattr(homotopy.solver, key) for key in homotopy.default_parameters}
+    return {key: value for key, value in parameters.items() if not callable(value)}
+
+
+def save_checkpoint(homotopy, path: str) -> None:
+    solver = homotopy.solver
+    state = {attr: cast(getattr(solver, attr)) for attr, cast in _SOLVER_STATE.items()}
+    # write to temporary file first: an interrupted save never leaves a broken checkpoint behind
+    try:
+        with open(f"{path}.tmp", 'wb') as file:
+            np.savez(file, y=solver.y, state=np.array(json.dumps(state)),
+                     parameters=np.array(json.dumps(get_solver_parameters(homotopy), default=lambda x: x.item())),
+                     fingerprint=np.array(homotopy_fingerprint(homotopy)))
+        os.replace(f"{path}.tmp", path)
+    except BaseException:
+        if os.path.exists(f"{path}.tmp"):
+            os.remove(f"{path}.tmp")
+        raise
+
+
+def load_checkpoint(homotopy, path: str, parameters: bool = True) -> None:
+    with np.load(path) as data:
+        if str(data['fingerprint']) != homotopy_fingerprint(homotopy):
+            raise ValueError(f'Checkpoint {path} was created for a different game or homotopy.')
+        # parameters first: set_parameters() resets ds to ds_initial, the state then restores it
+        if parameters:
+            homotopy.solver.set_parameters(json.loads(str(data['parameters'])))
+        homotopy.solver.y = data['y'].copy()
+        for attr, value in json.loads(str(data['state'])).items():
+            setattr(homotopy.solver, attr, value)
+
+
+def solve_in_chunks(homotopy, chunk_steps: int) -> Iterator[int]:
+    # runs the solver for at most chunk_steps at a time, yielding the step number in between
+    solver = homotopy.solver
+    max_steps = solver.max_steps
+    try:
+        while solver.step < max_steps:
+            solver.max_steps = min(solver.step + chunk_steps, max_steps)
+            homotopy.solve()
+            yield solver.step
+            # solver.converged also covers t_target = inf, where convergence is not a matter of t
+            if solver.converged or solver.step < solver.max_steps:
+                break  # converged or failed
+    finally:
+        solver.max_steps = max_steps
+
+
+def solve_with_autosave(homotopy, path: str, every_steps: int = 100, every_seconds: Optional[float] = None) -> None:
+    solver = homotopy.solver
+    verbose = solver.verbose
+    solver.verbose = 0  # otherwise, each chunk is reported as a failure to reach the target
+    last_save = time.perf_counter()
+    try:
+        for _ in solve_in_chunks(homotopy, every_steps):
+            if every_seconds is None or time.perf_counter() - last_save >= every_seconds:
+                save_checkpoint(homotopy, path)
+                last_save = time.perf_counter()
+    finally:
+        solver.verbose = verbose
+    save_checkpoint(homotopy, path)
+
+
+def instrument(homotopy) -> dict:
+    # call before solver_setup(): the solver then evaluates the wrapped H and J
+    stats = {'H_calls': 0, 'H_time': 0.0, 'J_calls': 0, 'J_time': 0.0, 'solve_time': 0.0, 'steps': 0,
+             'corrector_steps': 0, 'rejected_steps': 0, 'sign_flips': 0}
+
+    def timed(name: str, function: Callable) -> Callable:
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stats[f'{name}_time'] += time.perf_counter() - start
+                stats[f'{name}_calls'] += 1
+        return wrapper
+
+    homotopy.H = timed('H', homotopy.H)
+    homotopy.J = timed('J', homotopy.J)
+    return stats
+
+
+def solve_with_stats(homotopy, stats: dict, on_step: Optional[Callable[[dict], None]] = None) -> dict:
+    # solver methods are wrapped for the duration of the solve only, on top of any replaced before
+    # (e.g. by use_adaptive_stepsize); on_step receives a record of each step, as yielded by iter_steps
+    solver = homotopy.solver
+    adapt_stepsize, check_bifurcation = solver.adapt_stepsize, solver.check_bifurcation
+
+    def record_step() -> None:
+        stats['corrector_steps'] += solver.corrector_step
+        # failed corrector, or success rescinded because the step crossed t_target
+        stats['rejected_steps'] += not solver.corrector_success
+        if on_step is not None:
+            on_step({'step': solver.step, 't': solver.t, 's': solver.s, 'ds': solver.ds,
+                     'corrector_steps': solver.corrector_step, 'success': solver.corrector_success,
+                     'sign': solver.sign})
+
+    def counted_adapt_stepsize() -> None:
+        # called at the end of every step except the last one
+        record_step()
+        adapt_stepsize()
+
+    def counted_check_bifurcation() -> None:
+        sign = solver.sign
+        check_bifurcation()
+        stats['sign_flips'] += solver.sign != sign
+
+    solver.adapt_stepsize, solver.check_bifurcation = counted_adapt_stepsize, counted_check_bifurcation
+    step_start = solver.step
+    start = time.perf_counter()
+    try:
+        homotopy.solve()
+    finally:
+        solver.adapt_stepsize, solver.check_bifurcation = adapt_stepsize, check_bifurcation
+    stats['solve_time'] += time.perf_counter() - start
+    if solver.converged:
+        record_step()  # the last step returns before adapt_stepsize
+    stats['steps'] += solver.step - step_start
+    # remainder is mostly linear algebra (QR decompositions) and solver overhead
+    stats['other_time'] = stats['solve_time'] - stats['H_time'] - stats['J_time']
+    return stats
+
+
+def use_adaptive_stepsize(homotopy, target_corrector_steps: int = 5, distance_fraction: float = 0.5,
+                          max_inflation: float = 2.0) -> None:
+    # call after solver_setup(): after successful steps, ds is chosen from the curvature of the path
+    # and the number of corrector iterations; failed steps are handled by the solver's own rule (deflation)
+    solver = homotopy.solver
+    fallback = solver.adapt_stepsize
+    s_old = solver.s
+
+    def adapt_stepsize() -> None:
+        nonlocal s_old
+        arc_length, s_old = solver.s - s_old, solver.s
+        if not solver.corrector_success or arc_length <= 0:
+            fallback()
+            return
+        solver.consecutive_successes += 1
+
+        # curvature: change of the tangent's direction per arc length (abs: orientation may have been swapped);
+        # the linear predictor then misses the path by about curvature * ds**2 / 2
+        cos_angle = min(abs(np.dot(solver.tangent_old, solver.tangent)), 1.0)
+        curvature = np.arccos(cos_angle) / arc_length
+        # the solver's corrector fails once a correction exceeds corrector_distance_max * max(ds, 1)
+        # (HomContSolver.correct; relaxed for large ds): aim for a fraction of that
+        target_distance = distance_fraction * solver.corrector_distance_max * max(solver.ds, 1)
+        ds_curvature = np.sqrt(2 * target_distance / curvature) if curvature > 0 else np.inf
+        # corrector contraction: fewer iterations than targeted leave room for larger steps, and vice versa
+        ds_corrector = solver.ds * target_corrector_steps / max(solver.corrector_step, 1)
+
+        ds = min(ds_curvature, ds_corrector, max_inflation * solver.ds)
+        solver.ds = min(max(ds, solver.ds_deflation_factor * solver.ds, solver.ds_min), solver.ds_max)
+
+        # as in the solver: cap to avoid crossing t_target
+        if not np.isinf(solver.t_target) and solver.tangent[-1] != 0:
+            cap = (solver.t_target - solver.y[-1]) / (solver.tangent[-1] * solver.sign)
+            if cap > 0:
+                solver.ds = min(solver.ds, cap)
+
+    solver.adapt_stepsize = adapt_stepsize
+
+
+def _permute_players(game: sgamesolver.SGame, permutation: Sequence[int]) -> tuple[np.ndarray, np.ndarray]:
+    # relabels players: player i becomes player permutation[i]
+    u_axes = (0, 1) + tuple(2 + player for player in permutation)
+    phi_axes = (0,) + tuple(1 + player for player in permutation) + (len(permutation) + 1,)
+    return (np.transpose(game.u[:, list(permutation)], u_axes),
+            np.transpose(game.phi, phi_axes))
+
+
+def is_symmetric(game: sgamesolver.SGame) -> bool:
+    # invariance under a transposition and a cycle of players suffices: together, they generate all permutations
+    num_players = game.u.shape[1]
+    if num_players < 2:
+        return True
+    permutations = [(1, 0) + tuple(range(2, num_players)), tuple(range(1, num_players)) + (0,)]
+    for permutation in permutations:
+        u, phi = _permute_players(game, permutation)
+        if not (np.allclose(u, game.u) and np.allclose(phi, game.phi)
+                and np.allclose(game.delta[list(permutation)], game.delta)):
+            return False
+    return True
+
+
+def _solve_small_game(game: sgamesolver.SGame, homotopy_name: str) -> tuple[np.ndarray, np.ndarray]:
+    homotopy = getattr(sgamesolver.homotopy, homotopy_name)(game)
+    homotopy.solver_setup()
+    homotopy.solver.verbose = 0
+    homotopy.solve()
+    if homotopy.equilibrium is None:
+        # NaN instead of an exception: a single failed game should not end the whole batch
+        return np.full(game.action_mask.shape, np.nan), np.full(game.u.shape[:2], np.nan)
+    return homotopy.equilibrium.strategies, homotopy.equilibrium.values
+
+
+def solve_games(games: Sequence[sgamesolver.SGame], homotopy_name: str = 'QRE', n_workers: Optional[int] = None,
+                chunksize: int = 64) -> tuple[list[np.ndarray], list[np.ndarray]]:
+    # for many small games: games are sent to workers in chunks, keeping inter-process overhead per game low;
+    # strategies and values of games without equilibrium found are NaN
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        results = list(executor.map(_solve_small_game, games, [homotopy_name] * len(games), chunksize=chunksize))
+    strategies, values = zip(*results)
+    num_failed = sum(np.isnan(game_values).all() for game_values in values)
+    if num_failed:
+        warnings.warn(f'{num_failed} of {len(games)} games were not solved.')
+    return list(strategies), list(values)
+
+
+def _profile_probabilities(strategies: np.ndarray) -> np.ndarray:
+    # [..., state, player, action] -> [..., state, a_0, a_1, ...]: probability of each action profile
+    num_players = strategies.shape[-2]
+    probabilities = 1
+    for player in range(num_players):
+        shape = strategies.shape[:-2] + tuple(-1 if p == player else 1 for p in range(num_players))
+        probabilities = probabilities * strategies[..., player, :].reshape(shape)
+    return probabilities
+
+
+def evaluate_strategies(game: sgamesolver.SGame, strategies: np.ndarray, sparse: Optional[bool] = None,
+                        max_bytes: int = 2**27) -> np.ndarray:
+    # values V = u(sigma) + delta * phi(sigma) V of [..., state, player, action] strategies, shape [..., state, player]
+    strategies = np.nan_to_num(strategies)
+    num_states, num_players = game.u.shape[:2]
+    batch_shape = strategies.shape[:-3]
+    probabilities = _profile_probabilities(strategies).reshape(batch_shape + (num_states, -1))
+    u_sigma = np.einsum('...sa,sia->...is', probabilities, game.u.reshape(num_states, num_players, -1))
+    phi = game.phi.reshape(num_states, -1, num_states)
+
+    if sparse is None:
+        sparse = num_states > 500
+    if not sparse:
+        # one dense system per profile and player: profiles are processed in chunks of at most max_bytes of systems
+        # (peak memory is a small multiple of that: phi(sigma) and the copy made by the solver)
+        probabilities = probabilities.reshape((-1,) + probabilities.shape[-2:])
+        u_sigma = u_sigma.reshape((-1,) + u_sigma.shape[-2:])
+        delta = np.asarray(game.delta).reshape(num_players, 1, 1)
+        chunk_size = max(max_bytes // (8 * num_players * num_states**2), 1)
+        values = np.empty(u_sigma.shape)
+        for start in range(0, len(probabilities), chunk_size):
+            chunk = slice(start, start + chunk_size)
+            phi_sigma = np.einsum('bsa,sat->bst', probabilities[chunk], phi)
+            system = np.eye(num_states) - delta * phi_sigma[:, np.newaxis, :, :]
+            values[chunk] = np.linalg.solve(system, u_sigma[chunk, ..., np.newaxis])[..., 0]
+        return np.swapaxes(values.reshape(batch_shape + (num_players, num_states)), -1, -2)
+
+    # large state spaces, typically with few successor states each: phi(sigma) is assembled from the non-zero
+    # transitions only and each system is solved iteratively (well-conditioned: phi(sigma) is stochastic, delta < 1)
+    import scipy.sparse
+    import scipy.sparse.linalg
+    from_states, profiles, to_states = np.nonzero(phi)
+    weights = probabilities[..., from_states, profiles] * phi[from_states, profiles, to_states]
+    identity = scipy.sparse.identity(num_states, format='csr')
+    values = np.empty(batch_shape + (num_players, num_states))
+    for idx in np.ndindex(batch_shape):
+        phi_sigma = scipy.sparse.csr_matrix((weights[idx], (from_states, to_states)), shape=(num_states, num_states))
+        for player in range(num_players):
+            system = identity - game.delta[player] * phi_sigma
+            values[idx + (player,)], info = scipy.sparse.linalg.bicgstab(system, u_sigma[idx + (player,)],
+                                                                         rtol=1e-12, atol=0)
+            if info != 0:
+                raise RuntimeError(f'Iterative solver did not converge (info={info}).')
+    return np.swapaxes(values, -1, -2)
+
+
+def _action_values(game: sgamesolver.SGame, strategies: np.ndarray, values: np.ndarray) -> np.ndarray:
+    # value of each action given the other players' strategies and continuation values, [..., state, player, action]
+    num_states, num_players = game.u.shape[:2]
+    delta = np.asarray(game.delta)
+
+    # payoffs of pure action profiles given continuation values: [..., state, player, a_0, a_1, ...]
+    continuation = np.einsum('sat,...ti->...sia', game.phi.reshape(num_states, -1, num_states), values)
+    continuation = continuation.reshape(continuation.shape[:-1] + game.u.shape[2:])
+    payoffs = game.u + delta.reshape((num_players,) + (1,) * num_players) * continuation
+
+    action_values = np.zeros_like(strategies)
+    for player in range(num_players):
+        player_payoffs = payoffs.take(player, axis=-num_players - 1)
+        for other in range(num_players):
+            if other != player:
+                shape = strategies.shape[:-2] + tuple(-1 if p == other else 1 for p in range(num_players))
+                player_payoffs = (player_payoffs * strategies[..., other, :].reshape(shape)).sum(axis=other - num_players,
+                                                                                               keepdims=True)
+        action_values[..., player, :] = player_payoffs.reshape(action_values.shape[:-2] + (-1,))
+
+    action_values[..., ~game.action_mask] = -np.inf
+    return action_values
+
+
+def deviation_gains(game: sgamesolver.SGame, strategies: np.ndarray, values: Optional[np.ndarray] = None) -> np.ndarray:
+    # maximal gain from a one-shot deviation, shape [..., state, player]; all zero in equilibrium
+    strategies = np.nan_to_num(strategies)
+    if values is None:
+        values = evaluate_strategies(game, strategies)
+    return np.maximum(_action_values(game, strategies, values).max(axis=-1) - values, 0)
+
+
+def is_equilibrium(game: sgamesolver.SGame, strategies: np.ndarray, tol: float = 1e-6) -> np.ndarray:
+    return (deviation_gains(game, strategies) < tol).all(axis=(-1, -2))
+
+
+def cached_solve(homotopy, cache_dir: str, max_bytes: int = 10**9) -> tuple[np.ndarray, np.ndarray]:
+    # call after solver_setup() and after setting solver parameters: both are part of the cache key
+    solver = homotopy.solver
+    parameters = {**get_solver_parameters(homotopy), 't_target': solver.t_target, 'max_steps': solver.max_steps}
+    hasher = hashlib.sha256(homotopy_fingerprint(homotopy).encode())
+    hasher.update(json.dumps(parameters, sort_keys=True, default=lambda x: x.item()).encode())
+    filename = os.path.join(cache_dir, f"{hasher.hexdigest()}.npz")
+
+    try:
+        with np.load(filename) as data:
+            strategies, values, t = data['strategies'], data['values'], data['t'].item()
+        os.utime(filename)  # marks entry as recently used
+        homotopy.equilibrium = sgamesolver.sgame.StrategyProfile(homotopy.game, strategies, values, t)
+        return strategies, values
+    except FileNotFoundError:
+        pass
+
+    homotopy.equilibrium = None  # solve() keeps a previous equilibrium if it fails
+    homotopy.solve()
+    if homotopy.equilibrium is None:
+        raise RuntimeError('Solver did not find an equilibrium.')
+    strategies, values = homotopy.equilibrium.strategies, homotopy.equilibrium.values
+
+    # unique temporary file and atomic rename: safe if several processes write the same entry
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_filename = f"{filename}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_filename, 'wb') as file:
+            np.savez(file, strategies=strategies, values=values, t=homotopy.equilibrium.homotopy_parameter,
+                     steps=solver.step, s=solver.s)
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+        raise
+    _evict_cache(cache_dir, max_bytes)
+    return strategies, values
+
+
+def _evict_cache(cache_dir: str, max_bytes: int) -> None:
+    # least recently used entries are removed first
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith('.npz'):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:  # removed by another process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total_bytes = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total_bytes <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total_bytes -= size
+
+
+def _trace_from(rho: np.ndarray, y: Optional[np.ndarray], decimals: int,
+                max_steps: int) -> Optional[tuple[np.ndarray, np.ndarray]]:
+    # y=None: regular trace from the starting point; otherwise, trace the auxiliary path starting at equilibrium y
+    homotopy = sgamesolver.homotopy.LogTracing(_worker_game, rho=np.nan_to_num(rho))
+    homotopy.solver_setup()
+    homotopy.solver.verbose = 0
+    # auxiliary paths need not lead to another equilibrium: cap the total number of steps
+    homotopy.solver.max_steps = max_steps
+    if y is not None:
+        homotopy.solver.y = y.copy()
+        # walk away from t=1 first, in whichever direction the oriented tangent at y decreases t
+        homotopy.solver.t_target = 0.99
+        homotopy.solver.set_greedy_sign()
+        homotopy.solve()
+        if abs(homotopy.solver.t - 0.99) >= homotopy.solver.convergence_tol:
+            return None
+        homotopy.solver.t_target = 1
+        homotopy.equilibrium = None
+        for _ in solve_in_chunks(homotopy, 100):
+            if homotopy.solver.t < 0:
+                return None  # passed the starting point: the path leads to the equilibrium at its other end
+    else:
+        homotopy.solve()
+    if homotopy.equilibrium is None:
+        return None
+    return homotopy.equilibrium.strategies.round(decimals), homotopy.solver.y.copy()
+
+
+def explore_equilibria(game: sgamesolver.SGame, priors: Sequence[np.ndarray], n_workers: Optional[int] = None,
+                       decimals: int = 4, max_steps: int = 10000) -> tuple[np.ndarray, list[tuple[int, int, int]]]:
+    # returns distinct equilibria and the connections (equilibrium, equilibrium, prior) found between them;
+    # equilibrium -1 stands for the starting point of the respective prior
+    equilibria, points, edges = [], [], []
+    keys = {}
+    # (equilibrium, prior) pairs whose path under that prior is known or being traced already
+    known = set()
+
+    def add_equilibrium(strategies: np.ndarray, y: np.ndarray) -> int:
+        key = np.nan_to_num(strategies).tobytes()
+        if key not in keys:
+            keys[key] = len(equilibria)
+            equilibria.append(strategies)
+            points.append(y)
+        return keys[key]
+
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(game,)) as executor:
+        pending = {executor.submit(_trace_from, rho, None, decimals, max_steps): (-1, prior_idx)
+                   for prior_idx, rho in enumerate(priors)}
+        # all starting points first: their results tell which auxiliary paths need not be traced
+        wait(pending)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in [future for future in pending if future in done]:  # in order of submission
+                origin, prior_idx = pending.pop(future)
+                if future.exception() is not None:
+                    warnings.warn(f'Trace from equilibrium {origin} under prior {prior_idx} failed: '
+                                  f'{future.exception()!r}')
+                    continue
+                if future.result() is None:
+                    continue
+                eq_idx = add_equilibrium(*future.result())
+                if eq_idx != origin and (eq_idx, origin, prior_idx) not in edges:
+                    edges.append((origin, eq_idx, prior_idx))
+                # tracing back along the same path would just return to where it came from
+                known.add((eq_idx, prior_idx))
+                # follow the auxiliary paths starting at the equilibrium, under each prior not yet known
+                for other_prior_idx, rho in enumerate(priors):
+                    if (eq_idx, other_prior_idx) not in known:
+                        known.add((eq_idx, other_prior_idx))
+                        future = executor.submit(_trace_from, rho, points[eq_idx], decimals, max_steps)
+                        pending[future] = (eq_idx, other_prior_idx)
+
+    if not equilibria:
+        return np.empty((0,) + game.action_mask.shape), edges
+    return np.stack(equilibria), edges
+
+
+def polish_equilibrium(game: sgamesolver.SGame, strategies: np.ndarray, support_tol: float = 1e-3,
+                       max_distance: float = 1e-2, tol: float = 1e-10, max_iter: int = 20) -> Optional[np.ndarray]:
+    # Newton's method on the indifference conditions between the actions in the support guessed from strategies,
+    # i.e. those played with probability > support_tol; returns None if this does not yield an equilibrium
+    # within max_distance of strategies
+    strategies = np.nan_to_num(strategies)
+    support = strategies > support_tol
+    # probability of the most likely action of each state and player follows from the others
+    reference_actions = strategies.argmax(axis=-1)[..., np.newaxis]
+    reference = np.zeros_like(support)
+    np.put_along_axis(reference, reference_actions, True, axis=-1)
+    free = support & ~reference
+
+    def profile(x: np.ndarray) -> np.ndarray:
+        sigma = np.zeros_like(strategies)
+        sigma[free] = x
+        sigma[reference] = 1 - sigma.sum(axis=-1).flatten()
+        return sigma
+
+    def residual(x: np.ndarray) -> np.ndarray:
+        sigma = profile(x)
+        action_values = _action_values(game, sigma, evaluate_strategies(game, sigma))
+        # (not via multiplication with the mask: padded actions are -inf, and -inf * 0 is NaN)
+        reference_values = np.take_along_axis(action_values, reference_actions, axis=-1)
+        return (action_values - reference_values)[free]
+
+    x0 = x = (strategies / (strategies * support).sum(axis=-1, keepdims=True))[free]
+    for _ in range(max_iter):
+        r = residual(x)
+        if np.abs(r).max(initial=0) < tol:
+            break
+        # forward differences: the number of mixed actions near the end of the path is usually small
+        eps = 1e-7
+        jacobian = np.stack([(residual(x + eps * e) - r) / eps for e in np.eye(len(x))], axis=-1)
+        try:
+            x = x - np.linalg.lstsq(jacobian, r, rcond=None)[0]
+        except np.linalg.LinAlgError:
+            return None
+        if np.abs(x - x0).max() > max_distance:
+            return None
+
+    sigma = profile(x)
+    if (sigma < 0).any() or np.abs(sigma - strategies).max() > max_distance or not is_equilibrium(game, sigma):
+        return None
+    sigma[~game.action_mask] = np.nan
+    return sigma
+
+
+def solve_qre_endgame(homotopy: sgamesolver.homotopy.QRE, chunk_steps: int = 20, support_tol: float = 1e-3,
+                      max_distance: float = 1e-2) -> None:
+    # instead of tracing the path until strategies have converged for lambda -> inf, guess the limit's support
+    # every chunk_steps steps and polish; tracing continues if this fails, e.g. while lambda is still small
+    # (max_distance keeps the polished strategies close to the path, not at a different equilibrium)
+    game = homotopy.game
+    homotopy.equilibrium = None  # solver_setup() keeps the equilibrium of an earlier solve
+    previous_support, failed_supports = None, set()
+    for _ in solve_in_chunks(homotopy, chunk_steps):
+        if homotopy.solver.converged:
+            return
+        sigma, _, t = homotopy.y_to_sigma_V_t(homotopy.solver.y)
+        # polishing costs one value evaluation per mixed action and Newton iteration: only attempt it
+        # once the support guess has not changed since the previous chunk, and once per support
+        support = (np.nan_to_num(sigma) > support_tol).tobytes()
+        stable, previous_support = support == previous_support, support
+        if not stable or support in failed_supports:
+            continue
+        polished = polish_equilibrium(game, sigma, support_tol=support_tol, max_distance=max_distance)
+        if polished is None:
+            failed_supports.add(support)
+        else:
+            values = evaluate_strategies(game, polished)
+            homotopy.equilibrium = sgamesolver.sgame.StrategyProfile(game, polished, values, t)
+            return
+
+
+def iter_steps(homotopy) -> Iterator[dict]:
+    # runs the solver one predictor-corrector step at a time; ds is the step size for the next step
+    solver = homotopy.solver
+    verbose = solver.verbose
+    solver.verbose = 0  # otherwise, each step is reported as a failure to reach the target
+    try:
+        for step in solve_in_chunks(homotopy, 1):
+            yield {'step': step, 't': solver.t, 's': solver.s, 'ds': solver.ds,
+                   'corrector_steps': solver.corrector_step, 'success': solver.corrector_success}
+    finally:
+        solver.verbose = verbose
+
+
+async def solve_async(homotopy, timeout: Optional[float] = None, chunk_steps: int = 10,
+                      executor: Optional[Executor] = None) -> Optional[sgamesolver.sgame.StrategyProfile]:
+    # runs the solver in executor (default: the event loop's thread pool), chunk_steps at a time;
+    # timeout and cancellation take effect between chunks
+    loop = asyncio.get_running_loop()
+    deadline = None if timeout is None else loop.time() + timeout
+    chunks = solve_in_chunks(homotopy, chunk_steps)
+    try:
+        while True:
+            chunk = loop.run_in_executor(executor, next, chunks, None)
+            try:
+                step = await asyncio.shield(chunk)
+            except asyncio.CancelledError:
+                await chunk  # the running chunk cannot be interrupted: wait for it before cleaning up
+                raise
+            if step is None or homotopy.solver.converged:
+                return homotopy.equilibrium
+            if deadline is not None and loop.time() >= deadline:
+                raise TimeoutError(f'solver did not finish within {timeout}s (step {step})')
+    finally:
+        chunks.close()
@@ -0,0 +1,213 @@
+"""Benchmarks of sGameSolver on random games.
+
+Usage (from the repository root):
+
+    python -m examples.benchmark run results.json [--quick] [--repeat 3]
+    python -m examples.benchmark compare old.json new.json [--threshold 0.2] [--error-tol 1e-3]
+    python -m examples.benchmark imports [--budget 1.0]
+"""
+
+
+import argparse
+import itertools
+import json
+import math
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import sgamesolver
+
+from examples._helpers import deviation_gains, instrument, solve_with_stats, use_adaptive_stepsize
+
+
+HOMOTOPIES = {'QRE': sgamesolver.homotopy.QRE, 'LogTracing': sgamesolver.homotopy.LogTracing}
+
+GRID = {'num_states': [2, 8, 32],
+        'num_players': [2, 3],
+        'num_actions': [2, 4],
+        'seed': [0, 1, 2]}
+
+QUICK_GRID = {'num_states': [2, 8],
+              'num_players': [2],
+              'num_actions': [2, 3],
+              'seed': [0]}
+
+# increases below these are not flagged, whatever the relative change: e.g. timer noise on cases of a few ms
+MIN_INCREASE = {'wall_time': 0.01, 'steps': 2, 'J_calls': 2, 'rejected_steps': 2, 'peak_memory': 2**20}
+
+
+def setup_case(homotopy_name: str, parameters: str, game: sgamesolver.SGame) -> tuple:
+    homotopy = HOMOTOPIES[homotopy_name](game)
+    stats = instrument(homotopy)
+    homotopy.solver_setup()
+    if parameters == 'robust':
+        homotopy.solver.set_parameters(homotopy.robust_parameters)
+    elif parameters == 'adaptive':
+        use_adaptive_stepsize(homotopy)
+    homotopy.solver.verbose = 0
+    return homotopy, stats
+
+
+def time_case(homotopy_name: str, parameters: str, game: sgamesolver.SGame) -> tuple:
+    homotopy, stats = setup_case(homotopy_name, parameters, game)
+    start = time.perf_counter()
+    solve_with_stats(homotopy, stats)
+    return time.perf_counter() - start, homotopy, stats
+
+
+def run_case(homotopy_name: str, parameters: str, num_states: int, num_players: int, num_actions: int,
+             seed: int) -> dict:
+    game = sgamesolver.SGame.random_game(num_states, num_players, num_actions, seed=seed)
+
+    wall_time, homotopy, stats = time_case(homotopy_name, parameters, game)
+
+    # memory is measured in a separate run: tracing allocations would distort the timing
+    homotopy_memory, _ = setup_case(homotopy_name, parameters, game)
+    tracemalloc.start()
+    homotopy_memory.solve()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # quality of the result: maximal gain from a one-shot deviation
+    if homotopy.equilibrium is None:
+        error = float('nan')
+    else:
+        error = float(deviation_gains(game, homotopy.equilibrium.strategies).max())
+
+    return {'homotopy': homotopy_name, 'parameters': parameters, 'num_states': num_states,
+            'num_players': num_players, 'num_actions': num_actions, 'seed': seed,
+            'wall_time': wall_time, 'wall_time_max': wall_time, 'steps': int(homotopy.solver.step),
+            'H_calls': stats['H_calls'], 'J_calls': stats['J_calls'], 'corrector_steps': stats['corrector_steps'],
+            'rejected_steps': stats['rejected_steps'], 'peak_memory': peak_memory, 'error': error}
+
+
+def measure_import_time(module: str = 'sgamesolver', repeat: int = 5) -> float:
+    # fresh interpreters, so that modules already imported here do not interfere;
+    # the startup time of the interpreter itself is subtracted
+    def best_time(code: str) -> float:
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-c', code], check=True)
+            times.append(time.perf_counter() - start)
+        return min(times)
+    return best_time(f'import {module}') - best_time('pass')
+
+
+def slowest_imports(module: str = 'sgamesolver', num: int = 10) -> list[tuple[str, float]]:
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            check=True, capture_output=True, text=True).stderr
+    # lines: "import time: self [us] | cumulative | imported package"
+    imports = []
+    for line in output.splitlines()[1:]:
+        _, cumulative, name = line.split('|')
+        imports.append((name.strip(), int(cumulative) / 1e6))
+    return sorted(imports, key=lambda entry: entry[1], reverse=True)[:num]
+
+
+def imports(budget: float) -> int:
+    import_time = measure_import_time()
+    for name, cumulative in slowest_imports():
+        print(f"{cumulative:8.3f}s  {name}")
+    print(f"import sgamesolver: {import_time:.3f}s (budget {budget:.3f}s)")
+    return 1 if import_time > budget else 0
+
+
+def case_key(result: dict) -> tuple:
+    return tuple(result[key] for key in ('homotopy', 'parameters', 'num_states', 'num_players', 'num_actions', 'seed'))
+
+
+def run(filename: str, quick: bool = False, repeat: int = 3) -> None:
+    grid = QUICK_GRID if quick else GRID
+    cases = list(itertools.product(HOMOTOPIES, ['default', 'robust', 'adaptive'], *grid.values()))
+    results = []
+    for idx, case in enumerate(cases):
+        results.append(run_case(*case))
+        print(f"{idx+1}/{len(cases)} {case}: {results[-1]['wall_time']:.2f}s, {results[-1]['steps']} steps")
+
+    # wall time: best of several passes over all cases, rather than repeating each case right away,
+    # so that a burst of load on the machine does not affect all runs of a case
+    for num_pass in range(1, repeat):
+        for case, result in zip(cases, results):
+            homotopy_name, parameters, *game_parameters = case
+            game = sgamesolver.SGame.random_game(*game_parameters[:3], seed=game_parameters[3])
+            wall_time = time_case(homotopy_name, parameters, game)[0]
+            result['wall_time'] = min(result['wall_time'], wall_time)
+            result['wall_time_max'] = max(result['wall_time_max'], wall_time)
+        print(f"timing pass {num_pass+1}/{repeat} done")
+
+    with open(filename, 'w') as file:
+        json.dump({'sgamesolver': getattr(sgamesolver, '__version__', None), 'python': sys.version,
+                   'import_time': measure_import_time(), 'results': results}, file, indent=4)
+
+
+def compare(old_filename: str, new_filename: str, threshold: float = 0.2, error_tol: float = 1e-3) -> int:
+    with open(old_filename) as file:
+        old_data = json.load(file)
+    with open(new_filename) as file:
+        new_data = json.load(file)
+    old = {case_key(result): result for result in old_data['results']}
+    new = {case_key(result): result for result in new_data['results']}
+
+    regressions = 0
+    if 'import_time' in old_data and new_data['import_time'] > (1 + threshold) * old_data['import_time']:
+        regressions += 1
+        print(f"REGRESSION import_time: {old_data['import_time']:.4g} -> {new_data['import_time']:.4g}")
+    for key in sorted(old.keys() & new.keys()):
+        # failing cases, or cases returning non-equilibria, tend to be faster: check the result first
+        old_error, new_error = old[key]['error'], new[key]['error']
+        if math.isnan(new_error) and not math.isnan(old_error):
+            regressions += 1
+            print(f"REGRESSION {key} error: {old_error:.4g} -> no equilibrium found")
+        elif new_error > error_tol and not old_error > error_tol:
+            regressions += 1
+            print(f"REGRESSION {key} error: {old_error:.4g} -> {new_error:.4g} (tolerance {error_tol:.4g})")
+        for metric, min_increase in MIN_INCREASE.items():
+            if metric not in old[key] or metric not in new[key]:  # e.g. results of an older version of this script
+                continue
+            # wall time: the best new run must also be slower than all old runs, i.e. beyond their noise
+            old_value = old[key].get(f'{metric}_max', old[key][metric])
+            if new[key][metric] > (1 + threshold) * old[key][metric] and new[key][metric] - old_value > min_increase:
+                regressions += 1
+                print(f"REGRESSION {key} {metric}: {old[key][metric]:.4g} -> {new[key][metric]:.4g}")
+
+    old_time = sum(old[key]['wall_time'] for key in old.keys() & new.keys())
+    new_time = sum(new[key]['wall_time'] for key in old.keys() & new.keys())
+    print(f"{len(old.keys() & new.keys())} common cases, total time {old_time:.2f}s -> {new_time:.2f}s, "
+          f"{regressions} regressions (threshold {threshold:.0%})")
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmarks of sGameSolver on random games.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    parser_run = subparsers.add_parser('run', help='run benchmarks and save results as JSON')
+    parser_run.add_argument('filename')
+    parser_run.add_argument('--quick', action='store_true', help='use a small grid of games')
+    parser_run.add_argument('--repeat', type=int, default=3, help='number of timing passes over all cases (best is kept)')
+
+    parser_compare = subparsers.add_parser('compare', help='flag regressions between two result files')
+    parser_compare.add_argument('old_filename')
+    parser_compare.add_argument('new_filename')
+    parser_compare.add_argument('--threshold', type=float, default=0.2,
+                                help='relative increase that counts as regression')
+    parser_compare.add_argument('--error-tol', type=float, default=1e-3,
+                                help='maximal deviation gain of a result that counts as equilibrium')
+
+    parser_imports = subparsers.add_parser('imports', help='measure time of importing sgamesolver')
+    parser_imports.add_argument('--budget', type=float, default=1.0, help='maximal import time in seconds')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args.filename, quick=args.quick, repeat=args.repeat)
+        return 0
+    if args.command == 'imports':
+        return imports(args.budget)
+    return compare(args.old_filename, args.new_filename, threshold=args.threshold, error_tol=args.error_tol)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
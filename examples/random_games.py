@@ -1,5 +1,13 @@
+import asyncio
+import os
+import tempfile
+import timeit
 import sgamesolver
-from examples._helpers import solve_game
+import numpy as np
+from examples._helpers import solve_game, assert_games_equal, save_game, load_game, save_checkpoint, load_checkpoint, \
+    solve_with_autosave, instrument, solve_with_stats, \
+    evaluate_strategies, deviation_gains, is_equilibrium, \
+    cached_solve, solve_qre_endgame, iter_steps, solve_async
 
 
 game = sgamesolver.SGame.random_game(num_states=62, num_players=2, num_actions=4, seed=42)
@@ -9,6 +17,16 @@ homotopy.solve()
 print(homotopy.equilibrium)
 
 
+# saving and loading the game itself in a portable format (arrays and labels only);
+# loading rebuilds the game and takes as long as defining it: worker processes receive games pickled instead
+
+with tempfile.TemporaryDirectory() as tmp_dir:
+    save_game(game, os.path.join(tmp_dir, 'random_game.npz'))
+    game2 = load_game(os.path.join(tmp_dir, 'random_game.npz'))
+
+assert_games_equal(game, game2)
+
+
 # %% common discount factors and actions
 
 
@@ -35,6 +53,36 @@ game = sgamesolver.SGame.random_game(num_states=2, num_players=3,
 solve_game(game)
 
 
+# %% cost of evaluating H and J by number of players
+
+
+for num_players in [2, 3, 4]:
+    game = sgamesolver.SGame.random_game(num_states=4, num_players=num_players, num_actions=4, seed=42)
+    for homotopy in [sgamesolver.homotopy.QRE(game), sgamesolver.homotopy.LogTracing(game)]:
+        homotopy.solver_setup()
+        y = homotopy.solver.y
+        time_H = timeit.timeit(lambda: homotopy.H(y), number=100) / 100
+        time_J = timeit.timeit(lambda: homotopy.J(y), number=100) / 100
+        print(f"{type(homotopy).__name__}, {num_players} players: "
+              f"H {1e3*time_H:.3f} ms, J {1e3*time_J:.3f} ms per evaluation")
+
+
+# %% where does the time go: homotopy evaluation vs. linear algebra
+
+
+game = sgamesolver.SGame.random_game(num_states=32, num_players=3, num_actions=4, seed=42)
+homotopy = sgamesolver.homotopy.QRE(game)
+stats = instrument(homotopy)  # before solver_setup
+homotopy.solver_setup()
+homotopy.solver.verbose = 0
+step_records = []  # optional: one record per step, e.g. to plot the step size along the path
+solve_with_stats(homotopy, stats, on_step=step_records.append)
+print(stats)
+
+
+# %% many small games, e.g. for Monte Carlo studies: see random_games_parallel.py
+
+
 # %% solving games
 
 
@@ -55,6 +103,15 @@ homotopy.solver_setup()
 homotopy.solver.verbose = 0
 homotopy.solve()
 
+# verifying strategy profiles: values and maximal gains from one-shot deviations
+values = evaluate_strategies(game, homotopy.equilibrium.strategies)
+gains = deviation_gains(game, homotopy.equilibrium.strategies, values)
+assert is_equilibrium(game, homotopy.equilibrium.strategies, tol=1e-5)
+
+# ... also for a whole batch of candidate profiles at once
+candidates = np.stack([game.random_strategy(seed=seed) for seed in range(1000)])
+print(is_equilibrium(game, candidates).sum())
+
 homotopy.solver_setup()
 homotopy.solver.start_storing_path()
 homotopy.solve()
@@ -68,6 +125,31 @@ homotopy.plot_path(x_axis='t')
 homotopy.plot_path(x_axis='step')
 
 
+# %% caching results on disk: solving the same game again returns immediately
+
+
+# (in practice, a permanent cache_dir; a temporary directory keeps this example clean)
+with tempfile.TemporaryDirectory() as cache_dir:
+    for _ in range(2):
+        homotopy = sgamesolver.homotopy.LogTracing(sgamesolver.SGame.random_game(3, 3, 3, seed=123))
+        homotopy.solver_setup()
+        strategies, values = cached_solve(homotopy, cache_dir=cache_dir)
+
+
+# %% QRE: skipping the last stretch of the path towards lambda -> inf
+
+
+# second game: action sets of different sizes, i.e. with padded actions
+for game in [sgamesolver.SGame.random_game(num_states=30, num_players=3, num_actions=3, seed=0),
+             sgamesolver.SGame.random_game(num_states=10, num_players=2, num_actions=[2, 4], seed=0)]:
+    homotopy = sgamesolver.homotopy.QRE(game=game)
+    homotopy.solver_setup()
+    homotopy.solver.verbose = 0
+    solve_qre_endgame(homotopy)
+    print(f"equilibrium after {homotopy.solver.step} steps, lambda = {homotopy.equilibrium.homotopy_parameter:.0f}")
+    assert is_equilibrium(game, homotopy.equilibrium.strategies, tol=1e-8)
+
+
 # %% interacting with the solver
 
 
@@ -87,6 +169,45 @@ homotopy.solver.save_file('example.txt')
 homotopy.solver.load_file('example.txt')
 # State successfully loaded from example.txt.
 
+# binary checkpoints, including solver parameters and a fingerprint of game and homotopy
+# (in practice, somewhere permanent; a temporary directory keeps this example clean):
+
+with tempfile.TemporaryDirectory() as tmp_dir:
+    checkpoint = os.path.join(tmp_dir, 'checkpoint.npz')
+    save_checkpoint(homotopy, checkpoint)
+    load_checkpoint(homotopy, checkpoint)
+
+    # periodic autosave, e.g. for batch jobs that may be preempted:
+
+    homotopy.solver_setup()
+    homotopy.solver.verbose = 0
+    solve_with_autosave(homotopy, checkpoint, every_steps=10)
+
+    # ... after a restart, continue from the last checkpoint:
+
+    homotopy.solver_setup()
+    load_checkpoint(homotopy, checkpoint)
+    solve_with_autosave(homotopy, checkpoint, every_steps=10)
+
+# step by step, e.g. to monitor progress:
+
+homotopy.solver_setup()
+for record in iter_steps(homotopy):
+    print(f"step {record['step']}: t = {record['t']:.4g}, ds = {record['ds']:.4g}")
+
+# asynchronously, e.g. within a service: several solves at once, with a deadline
+
+
+async def solve_many(homotopies: list, timeout: float) -> list:
+    return await asyncio.gather(*(solve_async(homotopy, timeout=timeout) for homotopy in homotopies),
+                                return_exceptions=True)
+
+homotopies = [sgamesolver.homotopy.LogTracing(sgamesolver.SGame.random_game(16, 2, 3, seed=seed)) for seed in range(4)]
+for homotopy in homotopies:
+    homotopy.solver_setup()
+    homotopy.solver.verbose = 0
+equilibria = asyncio.run(solve_many(homotopies, timeout=60))
+
 
 # storing the path:
 
@@ -0,0 +1,22 @@
+"""Solving many small random games in parallel, e.g. for Monte Carlo studies.
+
+Kept separate from random_games.py: on platforms that spawn worker processes (Windows, macOS),
+each worker re-imports the script, so it should not do anything expensive at import time.
+"""
+
+
+import sgamesolver
+
+from examples._helpers import solve_games, is_equilibrium
+
+
+def main() -> None:
+    games = [sgamesolver.SGame.random_game(num_states=1, num_players=2, num_actions=2, seed=seed)
+             for seed in range(10000)]
+    strategies, values = solve_games(games)
+    print(f"{sum(is_equilibrium(game, strategy, tol=1e-4) for game, strategy in zip(games, strategies))} of "
+          f"{len(games)} games solved")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,7 +5,7 @@ import itertools
 import matplotlib.pyplot as plt
 from matplotlib.lines import Line2D
 from matplotlib import gridspec
-from examples._helpers import solve_game, assert_games_equal
+from examples._helpers import solve_game, assert_games_equal, compress_strategies, expand_strategies
 
 
 # %% alternating moves: sequential price competition
@@ -48,6 +48,15 @@ def get_next_state(state: tuple[int, np.ndarray], price: float) -> np.ndarray:
     return (next_player, next_other_prices)
 
 
+# look-up of state indices, used for the (deterministic) transitions
+state_index = {(player, tuple(other_prices)): idx for idx, (player, other_prices) in enumerate(state_space)}
+
+
+def get_state_index(state: tuple[int, np.ndarray]) -> int:
+    player, other_prices = state
+    return state_index[(player, tuple(other_prices))]
+
+
 # %% arrays
 
 
@@ -81,13 +90,12 @@ def make_transition_matrix(state: tuple[int, np.ndarray]) -> np.ndarray:
 
     for idx, price in enumerate(PRICE_GRID):
         next_state = get_next_state(state, price)
-        transition_probs = [1 if s == next_state else 0 for s in state_space]
 
         action_profile = np.zeros(NUM_PLAYERS, dtype=np.int32)
         action_profile[player] = idx
 
-        for s in range(len(state_space)):
-            transition_matrix[tuple(action_profile) + (s,)] = transition_probs[s]
+        # transitions are deterministic: only the successor state is reached
+        transition_matrix[tuple(action_profile) + (get_state_index(next_state),)] = 1
 
     return transition_matrix
 
@@ -136,7 +144,10 @@ assert_games_equal(game, game2)
 
 
 runs = 100
-strategies = np.zeros(shape=(runs, 24, 2, 12), dtype=np.float64)
+
+# only one player moves per state: store non-padded actions only
+action_mask = game.action_mask
+strategies = np.zeros(shape=(runs, action_mask.sum()), dtype=np.float64)
 
 for run in range(runs):
     rho = game.random_strategy(seed=run)
@@ -145,7 +156,7 @@ for run in range(runs):
     homotopy.solver_setup()
     homotopy.solver.verbose = 0  # make silent
     homotopy.solve()
-    strategies[run] = homotopy.equilibrium.strategies.round(4)
+    strategies[run] = compress_strategies(homotopy.equilibrium.strategies.round(4), action_mask)
     print(f"done run {run+1}/{runs}")
 
 
@@ -245,6 +256,6 @@ def plot_eq(strategy: np.ndarray, T: int = 30) -> plt.figure:
 
 
 run = 0
-fig = plot_eq(strategy=strategies[0])
+fig = plot_eq(strategy=expand_strategies(strategies[run], action_mask))
 
 fig.savefig('docs/source/img/sequential_price_competition_search_priors_random.svg', bbox_inches='tight')
@@ -6,7 +6,7 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
-from examples._helpers import solve_game, assert_games_equal
+from examples._helpers import solve_game, assert_games_equal, solve_qre_at, is_symmetric
 
 
 # %% normal-form game: stag hunt
@@ -51,6 +51,7 @@ homotopy.solver.verbose = 0  # make silent
 lambdas = np.arange(0.1, 2.1, 0.1)
 
 # for player_0 only (strategies of player_1 identical due to symmetry)
+assert is_symmetric(game)
 strategies = np.zeros(shape=(len(lambdas), 2), dtype=np.float64)
 
 for idx, lambda_ in enumerate(lambdas):
@@ -58,6 +59,12 @@ for idx, lambda_ in enumerate(lambdas):
     homotopy.solve()
     strategies[idx] = homotopy.equilibrium.strategies[0, 0]  # state_0, player_0
 
+# same, for all states and players at once:
+homotopy.solver_setup()
+homotopy.solver.verbose = 0
+all_strategies, all_values = solve_qre_at(homotopy, lambdas)
+assert np.allclose(strategies, all_strategies[:, 0, 0])
+
 plt.plot(lambdas, strategies[:, 0], label='stag')
 plt.plot(lambdas, strategies[:, 1], label='hare')
 plt.xlabel(r'$\lambda$')
@@ -125,6 +132,8 @@ print(homotopy_mixed.equilibrium)
 # player0 : v=7.00, σ=[0.667 0.333]
 # player1 : v=7.00, σ=[0.667 0.333]
 
+# The same, automated and in parallel: see stag_hunt_parallel.py
+
 
 # %% log tracing: searching prior space
 
@@ -150,6 +159,8 @@ for run in range(runs):
 
 print(np.unique(strategies, axis=0))
 
+# parallel search: see stag_hunt_parallel.py
+
 
 def get_eq(strat: np.ndarray) -> str:
     if np.allclose(strat, np.array([0, 1, 0, 1])):
@@ -0,0 +1,53 @@
+"""Stag hunt: searching prior space and exploring equilibria in parallel.
+
+Kept separate from stag_hunt.py: on platforms that spawn worker processes (Windows, macOS),
+each worker re-imports the script, so it should not do anything expensive at import time.
+"""
+
+
+import sgamesolver
+import numpy as np
+
+from examples._helpers import search_priors, explore_equilibria
+
+
+payoff_matrix = np.array([[[10, 1],
+                           [8, 5]],
+                          [[10, 8],
+                           [1, 5]]])
+game = sgamesolver.SGame.one_shot_game(payoff_matrix=payoff_matrix)
+game.action_labels = ['stag', 'hare']
+
+
+def search_random_priors(runs: int = 100) -> None:
+    # traces run in a process pool, equilibria are counted on the fly
+    priors = [game.random_strategy(seed=run) for run in range(runs)]
+    _, equilibria, counts = search_priors(game, priors, printout=True)
+    for equilibrium, count in zip(equilibria, counts):
+        print(f"{count:3d}x: {equilibrium[0].flatten()}")  # state 0
+
+
+def explore_from_stag_and_hare() -> None:
+    # trace from the starting points of both priors, then from each equilibrium backwards under the other prior;
+    # edges (origin, equilibrium, prior) record which path connects which equilibria (origin -1: starting point)
+    stag_prior = np.array([[[1, 0],
+                            [1, 0]]])
+    hare_prior = np.array([[[0, 1],
+                            [0, 1]]])
+    equilibria, edges = explore_equilibria(game, [stag_prior, hare_prior])
+    for idx, equilibrium in enumerate(equilibria):
+        print(f"{idx}: {equilibrium[0].flatten()}")  # state 0
+    # 0: [1. 0. 1. 0.]
+    # 1: [0. 1. 0. 1.]
+    # 2: [0.6667 0.3333 0.6667 0.3333]
+    print(edges)
+    # [(-1, 0, 0), (-1, 1, 1), (0, 2, 1), (1, 2, 0)]  (the last two in order of completion)
+
+
+def main() -> None:
+    search_random_priors()
+    explore_from_stag_and_hare()
+
+
+if __name__ == '__main__':
+    main()